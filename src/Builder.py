@@ -1,15 +1,40 @@
 import os
+import sys
+import stat
+import copy
+import json
+import shutil
 import logging
-import jsonpickle
 import yaml
-from pathlib import Path
 import eons
+from concurrent.futures import ThreadPoolExecutor
 from .Exceptions import *
 
+# Prefer libyaml's C parser; fall back to the pure-python one if PyYAML was built without it.
+try:
+	from yaml import CSafeLoader as YamlLoader
+except ImportError:
+	from yaml import SafeLoader as YamlLoader
+
+
+# Yaml doesn't allow tabs. We do.
+# DetabReader converts them as the parser reads the file, so we don't have to hold converted copies of the whole file.
+class DetabReader:
+	def __init__(this, file):
+		this.file = file
+
+	def read(this, size=-1):
+		return this.file.read(size).replace('\t', '  ')
+
+
 class Builder(eons.StandardFunctor):
 
 	primaryFunctionName = "Build"
 
+	# Parsed config files, keyed by GetConfigCacheKey().
+	# Shared by all Builders in this process.
+	configCache = {}
+
 	def __init__(this, name=eons.INVALID_NAME()):
 		super().__init__(name)
 
@@ -34,6 +59,10 @@ class Builder(eons.StandardFunctor):
 		this.enableRollback = False
 
 		this.events = []
+		this.eventSet = frozenset() # for quick lookups; see ParseInitialArgs
+
+		# Whether or not our config was handed to us (e.g. by our precursor) rather than read from a local config file.
+		this.configProvided = False
 
 
 	# Build things!
@@ -84,47 +113,69 @@ class Builder(eons.StandardFunctor):
 				setattr(this, f"{path}Path", None)
 			return
 
-		this.rootPath = str(Path(rootPath).resolve())
+		this.rootPath = os.path.realpath(rootPath)
 		logging.debug(f"rootPath for {this.name} is {this.rootPath}")
 
-		this.buildPath = str(Path(this.rootPath).joinpath(buildFolder))
-		Path(this.buildPath).mkdir(parents=True, exist_ok=True)
+		this.buildPath = os.path.normpath(os.path.join(this.rootPath, buildFolder))
+		this.EnsureDirectory(this.buildPath)
 
 		logging.debug(f"buildPath for {this.name} is {this.buildPath}")
 
+		# List rootPath once rather than probing for each path.
+		try:
+			with os.scandir(this.rootPath) as entries:
+				dirs = {entry.name: entry.path for entry in entries if entry.is_dir()}
+		except FileNotFoundError:
+			dirs = {}
+
+		logPaths = logging.getLogger().isEnabledFor(logging.DEBUG)
 		for path in paths:
-			tmpPath = os.path.abspath(os.path.join(this.rootPath, path))
-			if (os.path.isdir(tmpPath)):
-				setattr(this, f"{path}Path", tmpPath)
-			else:
-				setattr(this, f"{path}Path", None)
-			logging.debug(f"{path}Path for {this.name} is {getattr(this, f'{path}Path')}")
+			fullPath = dirs.get(path)
+			setattr(this, f"{path}Path", fullPath)
+			if (logPaths):
+				logging.debug(f"{path}Path for {this.name} is {fullPath}")
+
+
+	# Create path and any missing parents.
+	# Most of the time, path already exists, in which case a single stat is all we need.
+	@staticmethod
+	def EnsureDirectory(path):
+		if (not os.path.isdir(path)):
+			os.makedirs(path, exist_ok=True)
 
 
 	# Populate the configuration details for *this.
 	def PopulateLocalConfig(this, configName=None):
 		localConfigFile = None
+		foundConfig = False
 		if (not configName):
 			if (this.executor):
-				for ext in this.executor.default.config.extensions:
+				# List buildPath once rather than probing for each extension.
+				buildFiles = set(os.listdir(this.buildPath))
+				# EBBS resolves these in InitData; for any other executor, we cache them on first use.
+				# NOTE: we check vars() rather than getattr(), since a missing attribute on a Functor triggers a Fetch.
+				extensions = vars(this.executor).get('configExtensions')
+				if (extensions is None):
+					extensions = tuple(this.executor.default.config.extensions)
+					this.executor.configExtensions = extensions
+				for ext in extensions:
 					possibleConfigName = f"build.{type(this).__name__}.{ext}"
-					possibleConfig = Path(this.buildPath).joinpath(possibleConfigName)
-					logging.debug(f"Looking for configuration file: {possibleConfig}")
-					if (possibleConfig.exists()):
+					logging.debug(f"Looking for configuration file: {possibleConfigName}")
+					if (possibleConfigName in buildFiles):
 						configName = possibleConfigName
-						localConfigFile = possibleConfig
+						localConfigFile = os.path.join(this.buildPath, possibleConfigName)
+						foundConfig = True
 						logging.debug(f"Found configuration file: {configName}")
 						break
 			else:
 				configName = f"build.{type(this).__name__}.json"
-				
-		if (not localConfigFile):
-			try:
-				localConfigFile = Path(this.buildPath).joinpath(configName)
-			except:
-				localConfigFile = None
-		
-		if (not configName or not localConfigFile or not localConfigFile.exists()):
+
+		# The listing above already told us whether the file exists; otherwise, check once.
+		if (not foundConfig and configName and this.buildPath):
+			localConfigFile = os.path.join(this.buildPath, configName)
+			foundConfig = os.path.isfile(localConfigFile)
+
+		if (not foundConfig):
 			if (this.executor and not this.precursor):
 				this.config = this.executor.config
 				logging.debug(f"Using executor config: {this.config}")
@@ -135,18 +186,48 @@ class Builder(eons.StandardFunctor):
 				return
 			
 		configType = str(localConfigFile).split(".")[-1]
-		localConfigFile = open(localConfigFile, "r")
 
-		if (this.executor):
-			this.config = this.executor.ParseConfigFile(this.executor, configType, localConfigFile)
-			return
-			
+		# Data configs are often read again by later Builders; reuse the parsed result while the file is unchanged.
+		cacheKey = None
 		if (configType in ['json', 'yml', 'yaml']):
-			# Yaml doesn't allow tabs. We do. Convert.
-			this.config = yaml.safe_load(localConfigFile.read().replace('\t', '  '))
-			return
-		
-		raise OtherBuildError(f"Config file type {configType} is not supported. Consider supplying an executor to {this.name}.")
+			cacheKey = this.GetConfigCacheKey(localConfigFile)
+			if (cacheKey in Builder.configCache):
+				logging.debug(f"Using cached configuration for {localConfigFile}")
+				this.config = copy.deepcopy(Builder.configCache[cacheKey])
+				return
+
+		with open(localConfigFile, "r") as configFile:
+			if (this.executor):
+				config = this.executor.ParseConfigFile(this.executor, configType, configFile)
+			elif (configType in ['json', 'yml', 'yaml']):
+				config = yaml.load(DetabReader(configFile), Loader=YamlLoader)
+			else:
+				raise OtherBuildError(f"Config file type {configType} is not supported. Consider supplying an executor to {this.name}.")
+
+		if (cacheKey is not None):
+			config = this.InternKeys(config)
+			Builder.configCache[cacheKey] = copy.deepcopy(config)
+		this.config = config
+
+
+	# Configs repeat the same handful of keys ("build", "next", "config", ...) many times over.
+	# RETURNS value with every string key interned, so that those keys are shared rather than duplicated.
+	# NOTE: copy.deepcopy keeps strings as-is, so cached copies share the interned keys too.
+	@staticmethod
+	def InternKeys(value):
+		if (isinstance(value, dict)):
+			return {(sys.intern(k) if isinstance(k, str) else k): Builder.InternKeys(v) for k, v in value.items()}
+		if (isinstance(value, list)):
+			return [Builder.InternKeys(v) for v in value]
+		return value
+
+
+	# RETURNS the key under which the parsed contents of configFile are cached.
+	# Any change to the file's size or modification time invalidates the cached value.
+	@staticmethod
+	def GetConfigCacheKey(configFile):
+		configStat = os.stat(configFile)
+		return (str(configFile), configStat.st_mtime_ns, configStat.st_size)
 
 
 	# Calls PopulatePaths and PopulateVars after getting information from local directory
@@ -156,7 +237,10 @@ class Builder(eons.StandardFunctor):
 	def PopulateProjectDetails(this):
 		if ('path' in this.kwargs and 'build_in' in this.kwargs):
 			this.PopulatePaths(this.kwargs.pop('path'), this.kwargs.pop('build_in'))
-			this.PopulateLocalConfig()
+			if (this.configProvided):
+				logging.debug(f"Using config provided to {this.name}")
+			else:
+				this.PopulateLocalConfig()
 			details = os.path.basename(this.rootPath).split(".")
 		else:
 			this.PopulatePaths(None, None)
@@ -168,9 +252,18 @@ class Builder(eons.StandardFunctor):
 		if (len(details) > 1):
 			default_name = '.'.join(details[:-1])
 
+		defaults = {
+			"name": default_name,
+			"type": default_type,
+		}
+
 		# This is messy because we can't query this.name or executor.name and need to get "name" from a config or arg val to set projectName.
+		# We only ask the executor if we can't find the key ourselves.
 		for key, mem in this.configNameOverrides.items():
-			this.Set(mem, this.FetchWithout(['this', 'executor', 'precursor', 'globals'], key, default=this.executor.FetchWithout(['this', 'globals'], key, default=eval(f"default_{key}"), start=False)[0]))
+			val, found = this.FetchWithout(['this', 'executor', 'precursor', 'globals'], key, start=False)
+			if (not found):
+				val = this.executor.FetchWithout(['this', 'globals'], key, default=defaults.get(key), start=False)[0]
+			this.Set(mem, val)
 			# if (getattr(this, mem) is None):
 			# 	logging.warning(f"Not configured: {key}")
 
@@ -191,27 +284,36 @@ class Builder(eons.StandardFunctor):
 			this.events = this.kwargs.pop('events')
 		else:
 			logging.warning(f"{this.name} found no events.")
+		this.eventSet = frozenset(this.events)
+
+		# A config handed to us by our precursor takes the place of a local config file.
+		this.config = None
+		this.configProvided = False
+		if ('config' in this.kwargs):
+			this.config = this.kwargs.pop('config')
+			this.configProvided = this.config is not None
+
 		this.PopulateProjectDetails()
 
 
 	# RETURNS whether or not we should trigger the next Builder based on what events invoked ebbs.
 	# Anything in the "run_when_any" list will require a corresponding --event specification to run.
 	# For example "run_when_any":["publish"] would require `--event publish` to enable publication Builders in the workflow.
-	def ValidateNext(this, nextBuilder):		
-		if ("run_when_none" in nextBuilder):
-			if ([r for r in nextBuilder["run_when_none"] if r in this.events]):
-				logging.info(f"Skipping next builder: {nextBuilder['build']}; prohibitive events found (cannot have any of {nextBuilder['run_when_none']} and have {this.events})")
-				return False
-
-		if ("run_when_any" in nextBuilder):
-			if (not [r for r in nextBuilder["run_when_any"] if r in this.events]): #[] is false
-				logging.info(f"Skipping next builder: {nextBuilder['build']}; required events not met (needs any of {nextBuilder['run_when_any']} but only have {this.events})")
-				return False
-
-		if ("run_when_all" in nextBuilder):
-			if (not set([str(r) for r in nextBuilder["run_when_all"]]).issubset(this.events)):
-				logging.info(f"Skipping next builder: {nextBuilder['build']}; required events not met (needs all {nextBuilder['run_when_all']} but only have {this.events})")
-				return False
+	def ValidateNext(this, nextBuilder):
+		runWhenNone = nextBuilder.get("run_when_none")
+		if (runWhenNone is not None and not this.eventSet.isdisjoint(runWhenNone)):
+			logging.info(f"Skipping next builder: {nextBuilder['build']}; prohibitive events found (cannot have any of {runWhenNone} and have {this.events})")
+			return False
+
+		runWhenAny = nextBuilder.get("run_when_any")
+		if (runWhenAny is not None and this.eventSet.isdisjoint(runWhenAny)):
+			logging.info(f"Skipping next builder: {nextBuilder['build']}; required events not met (needs any of {runWhenAny} but only have {this.events})")
+			return False
+
+		runWhenAll = nextBuilder.get("run_when_all")
+		if (runWhenAll is not None and not all((r if isinstance(r, str) else str(r)) in this.eventSet for r in runWhenAll)):
+			logging.info(f"Skipping next builder: {nextBuilder['build']}; required events not met (needs all {runWhenAll} but only have {this.events})")
+			return False
 
 		return True
 
@@ -232,41 +334,150 @@ class Builder(eons.StandardFunctor):
 		if ("path" in nextBuilder):
 			nextRootPath = nextBuilder["path"]
 		if (nextRootPath.startswith("/")):
-			nextRootPath = Path(this.executor.rootPath).joinpath(nextRootPath[1:])
+			nextRootPath = os.path.join(this.executor.rootPath, nextRootPath[1:])
 		else:
-			nextRootPath = Path(this.buildPath).joinpath(nextRootPath)
+			nextRootPath = os.path.join(this.buildPath, nextRootPath)
 
-		nextBuildPath = nextRootPath.joinpath(nextBuildPath)
+		nextBuildPath = os.path.join(nextRootPath, nextBuildPath)
 
 		# mkpath(nextRootPath) <- just broken.
-		nextBuildPath.mkdir(parents=True, exist_ok=True)
+		this.EnsureDirectory(nextBuildPath)
 		logging.debug(f"Next build path is: {nextBuildPath}")
 
-		if ("copy" in nextBuilder):
-			# dict() is necessary to strip off any wrappers, like DotDict, etc.
-			# otherwise getattr(nextBuilder, 'copy') gives the built in copy method...
-			for cpy in dict(nextBuilder)["copy"]:
-				# logging.debug(f"copying: {cpy}")
-				for src, dst in cpy.items():
-					this.Copy(src, Path(nextRootPath).joinpath(dst), root=this.executor.rootPath)
+		# Use item access here: nextBuilder.copy would give the built in dict.copy method.
+		copies = []
+		for cpy in nextBuilder.get("copy", ()):
+			# logging.debug(f"copying: {cpy}")
+			for src, dst in cpy.items():
+				# As with eons' Copy, a leading '/' means the executor's rootPath.
+				if (src.startswith('/')):
+					src = os.path.join(this.executor.rootPath, src[1:])
+				copies.append((os.path.realpath(src), os.path.realpath(os.path.join(nextRootPath, dst))))
+		this.CopyAll(copies)
 
 		if ("config" in nextBuilder and nextBuilder["config"]):
-			nextConfigFileName = f"build.{nextBuilder['build']}.json"
-			nextConfigFile = nextBuildPath.joinpath(nextConfigFileName)
-			logging.debug(f"writing: {nextConfigFile}")
-			nextConfig = open(nextConfigFile, "w")
 			for key, var in this.configNameOverrides.items():
 				if (key not in nextBuilder["config"]):
 					val = getattr(this, var)
 					logging.debug(f"Adding to config: {key} = {val}")
 					nextBuilder["config"][key] = val
-			nextConfig.write(jsonpickle.encode(dict(nextBuilder["config"])))
-			nextConfig.close()
+
+			# The config is handed to the next Builder directly (see CallNext).
+			# We only write it out when debugging, so that it can be inspected.
+			if (logging.getLogger().isEnabledFor(logging.DEBUG)):
+				nextConfigFileName = f"build.{nextBuilder['build']}.json"
+				nextConfigFile = os.path.join(nextBuildPath, nextConfigFileName)
+				logging.debug(f"writing: {nextConfigFile}")
+				with open(nextConfigFile, "w") as nextConfig:
+					json.dump(dict(nextBuilder["config"]), nextConfig, default=this.FlattenForJson)
 
 		logging.debug(f">---- Completed preparation for: {nextBuilder['build']} ----<")
 		return nextRootPath
 
 
+	# Copy each (source, destination) pair in copies.
+	# Copies are I/O bound, so they are run concurrently unless one could affect another (i.e. their paths overlap), in which case they are run in order.
+	# NOTE: this intentionally does not go through this.Copy, so any Copy override installed on *this or our precursor is not honoured here.
+	# Copy is an eons method Functor which keeps its call state on itself, so it can't be called from multiple threads at once.
+	def CopyAll(this, copies):
+		if (len(copies) < 2 or this.DoCopiesOverlap(copies)):
+			for source, destination in copies:
+				this.CopyPath(source, destination)
+			return
+
+		with ThreadPoolExecutor(max_workers=min(len(copies), 32, (os.cpu_count() or 1) * 4)) as pool:
+			futures = [pool.submit(this.CopyPath, source, destination) for source, destination in copies]
+			for future in futures:
+				future.result() # re-raise anything that went wrong.
+
+
+	# RETURNS whether or not any destination in copies is, contains, or is contained by any other path in copies.
+	@staticmethod
+	def DoCopiesOverlap(copies):
+		for i, (_, destination) in enumerate(copies):
+			for j, (source, other) in enumerate(copies):
+				if (i == j):
+					continue
+				for path in [source, other]:
+					if (destination == path or destination.startswith(path + os.sep) or path.startswith(destination + os.sep)):
+						return True
+		return False
+
+
+	# Copy a file or folder from source to destination.
+	# Both paths should already be resolved.
+	# This does what eons' Copy does but, unlike that method Functor, is safe to call from multiple threads.
+	@staticmethod
+	def CopyPath(source, destination):
+		Builder.EnsureDirectory(os.path.dirname(destination))
+		try:
+			sourceMode = os.stat(source).st_mode
+		except FileNotFoundError:
+			logging.error(f"Could not find source to copy: {source}")
+			return
+
+		if (stat.S_ISREG(sourceMode)):
+			logging.debug(f"Copying file {source} to {destination}")
+			if (os.path.isdir(destination)):
+				destination = os.path.join(destination, os.path.basename(source))
+			try:
+				# Same as shutil.copy, but reuses the stat we already have for the permissions.
+				shutil.copyfile(source, destination)
+				os.chmod(destination, stat.S_IMODE(sourceMode))
+			except shutil.Error as exc:
+				Builder.LogCopyError(exc)
+
+		elif (stat.S_ISDIR(sourceMode)):
+			logging.debug(f"Copying directory {source} to {destination}")
+			try:
+				shutil.copytree(source, destination)
+			except shutil.Error as exc:
+				Builder.LogCopyError(exc)
+				# As with eons' Copy, give each child another go on its own.
+				with os.scandir(source) as subs:
+					for sub in subs:
+						try:
+							if (sub.is_dir()):
+								shutil.copytree(sub.path, os.path.join(destination, sub.name))
+							else:
+								shutil.copy(sub.path, os.path.join(destination, sub.name))
+						except shutil.Error as exc2:
+							Builder.LogCopyError(exc2)
+
+		else:
+			logging.error(f"Could not find source to copy: {source}")
+
+
+	# Log what went wrong in a shutil.Error.
+	# copytree reports a list of (src, dst, msg); other shutil.Errors (e.g. SameFileError) just have a message.
+	@staticmethod
+	def LogCopyError(error):
+		errors = error.args[0] if error.args else None
+		if (isinstance(errors, list)):
+			for src, dst, msg in errors:
+				logging.debug(f"{msg}")
+		else:
+			logging.debug(f"{error}")
+
+
+	# json.dump hook for values the json module can't write natively.
+	# Numeric scalars from libraries like numpy are written as the plain numbers they hold.
+	# jsonpickle is only needed (and imported) if anything else that isn't plain json made it into a config.
+	@staticmethod
+	def FlattenForJson(value):
+		item = getattr(value, 'item', None)
+		if (callable(item)):
+			try:
+				item = item()
+				if (item is None or isinstance(item, (str, int, float, bool))):
+					return item
+			except (TypeError, ValueError):
+				pass
+
+		import jsonpickle
+		return jsonpickle.Pickler().flatten(value)
+
+
 	# Runs the next Builder.
 	# Uses the Executor passed to *this.
 	# RETURNS: True if all next build steps succeeded; False if any Failed.
@@ -275,18 +486,27 @@ class Builder(eons.StandardFunctor):
 			return None
 
 		ret = None
+		build = this.executor.Build
+		events = this.events
 		for nxt in this.next:
 			if (not this.ValidateNext(nxt)):
 				continue
 			nxtPath = this.PrepareNext(nxt)
-			buildFolder = f"then_build_{nxt['build']}"
-			if ("build_in" in nxt):
-				buildFolder = nxt["build_in"]
-			ret = this.executor.Build(
-				build=nxt["build"],
+			nxtBuild = nxt["build"]
+			buildFolder = nxt.get("build_in")
+			if (buildFolder is None):
+				buildFolder = f"then_build_{nxtBuild}"
+			# The next Builder gets its own copy of its config, just as it would from reading a config file.
+			# Otherwise, its changes would leak into our next tree (and any other steps sharing that config).
+			nxtConfig = None
+			if (nxt.get("config")):
+				nxtConfig = copy.deepcopy(nxt["config"])
+			ret = build(
+				build=nxtBuild,
 				path=nxtPath,
 				build_in=buildFolder,
-				events=this.events,
+				events=events,
+				config=nxtConfig,
 				precursor=this)
 		return ret
 
@@ -300,30 +520,32 @@ class Builder(eons.StandardFunctor):
 	def Function(this):
 		logging.debug(f"<---- Preparing {this.name} ---->")
 
+		# Fail before touching the build path or running any hooks.
+		if (len(this.supportedProjectTypes) and this.projectType not in this.supportedProjectTypes):
+			raise ProjectTypeNotSupported(
+				f"{this.projectType} is not supported. Supported project types for {this.name} are {this.supportedProjectTypes}")
+
 		if (this.buildPath):
+			# PopulatePaths already created the build path; we only need to recreate it if we just deleted it.
 			if (this.clearBuildPath):
 				this.Delete(this.buildPath)
-
-			# mkpath(this.buildPath) <- This just straight up doesn't work. Race condition???
-			Path(this.buildPath).mkdir(parents=True, exist_ok=True)
+				# mkpath(this.buildPath) <- This just straight up doesn't work. Race condition???
+				os.makedirs(this.buildPath, exist_ok=True)
 			os.chdir(this.buildPath)
 
 		this.PreBuild()
 
-		if (len(this.supportedProjectTypes) and this.projectType not in this.supportedProjectTypes):
-			raise ProjectTypeNotSupported(
-				f"{this.projectType} is not supported. Supported project types for {this.name} are {this.supportedProjectTypes}")
-
 		logging.debug(f">---- Done Preparing {this.name} ----<")
 
-		runMessage = f"Building {this.name}"
-		if (this.projectName):
-			runMessage += f" for \"{this.projectName}\""
-		if (this.projectType != this.projectName):
-			runMessage += f", a \"{this.projectType}\""
-		if (this.buildPath):
-			runMessage += f"in {this.buildPath}"
-		logging.info(runMessage)
+		if (logging.getLogger().isEnabledFor(logging.INFO)):
+			runMessage = ["Building ", this.name]
+			if (this.projectName):
+				runMessage += [" for \"", str(this.projectName), "\""]
+			if (this.projectType != this.projectName):
+				runMessage += [", a \"", str(this.projectType), "\""]
+			if (this.buildPath):
+				runMessage += [" in ", this.buildPath]
+			logging.info(''.join(runMessage))
 
 		logging.debug(f"<---- Building {this.name} ---->")
 		ret = this.Build()
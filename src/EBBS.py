@@ -1,8 +1,10 @@
 import os
 import logging
 import eons
+import yaml
 from pathlib import Path
 from .Exceptions import *
+from .Builder import YamlLoader, DetabReader
 
 class EBBS(eons.Executor):
 
@@ -55,6 +57,16 @@ class EBBS(eons.Executor):
 			[[this.events.add(str(e)) for e in l] for l in this.parsedArgs.events]
 
 
+	#Override of eons.Executor method. See that class for details
+	#Json and yaml configs are parsed with the libyaml loader when available; everything else is left to eons.
+	#Json goes through yaml too: we allow a bit more than json (e.g. yaml syntax in a .json file).
+	@staticmethod
+	def ParseConfigFile(executor, configType, configFile, *args, **kwargs):
+		if (configType in ['json', 'yml', 'yaml']):
+			return yaml.load(DetabReader(configFile), Loader=YamlLoader)
+		return eons.Executor.ParseConfigFile(executor, configType, configFile, *args, **kwargs)
+
+
 	def WarmUpFlow(this, flow):
 		flow.WarmUp(executor=this, path=this.rootPath, build_in=this.default.build.directory, events=this.events, **this.extraArgs)
 
@@ -73,6 +85,9 @@ class EBBS(eons.Executor):
 		)
 		this.Set('buildPath', str(Path('./').joinpath(this.default.build.directory).resolve()), False)
 
+		# Every Builder looks for its config with these; resolve them once.
+		this.Set('configExtensions', tuple(this.default.config.extensions), False)
+
 
 	#Override of eons.Executor method. See that class for details
 	def Function(this):
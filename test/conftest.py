@@ -0,0 +1,8 @@
+import sys
+import types
+from pathlib import Path
+
+# Expose src/ as the ebbs package, so that these tests exercise this tree rather than whatever ebbs is installed.
+ebbs = types.ModuleType('ebbs')
+ebbs.__path__ = [str(Path(__file__).resolve().parent.parent.joinpath('src'))]
+sys.modules['ebbs'] = ebbs
@@ -0,0 +1,224 @@
+import os
+import pytest
+from ebbs import Builder as BuilderModule
+from ebbs.Builder import Builder
+
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+	Builder.configCache.clear()
+	yield
+	Builder.configCache.clear()
+
+
+# A Builder that reads its config from buildPath without an executor.
+def make_builder(buildPath):
+	builder = Builder("test")
+	builder.executor = None
+	builder.precursor = None
+	builder.buildPath = str(buildPath)
+	return builder
+
+
+def write_config(path, text, mtime_ns=None):
+	path.write_text(text)
+	if (mtime_ns is not None):
+		os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_config_cache_hit_is_independent_copy(tmp_path, monkeypatch):
+	write_config(tmp_path.joinpath("build.yaml"), "list:\n\t- a\nnested:\n\tkey: value\n")
+
+	first = make_builder(tmp_path)
+	first.PopulateLocalConfig("build.yaml")
+	assert(first.config == {'list': ['a'], 'nested': {'key': 'value'}})
+	assert(len(Builder.configCache) == 1)
+
+	first.config['list'].append('b')
+	first.config['nested']['key'] = 'changed'
+
+	# A second read must come from the cache, not the parser.
+	def fail(*args, **kwargs):
+		raise AssertionError("config was parsed again")
+	monkeypatch.setattr(BuilderModule.yaml, 'load', fail)
+
+	second = make_builder(tmp_path)
+	second.PopulateLocalConfig("build.yaml")
+	assert(second.config == {'list': ['a'], 'nested': {'key': 'value'}})
+	assert(second.config is not first.config)
+
+	second.config['list'].append('c')
+	third = make_builder(tmp_path)
+	third.PopulateLocalConfig("build.yaml")
+	assert(third.config == {'list': ['a'], 'nested': {'key': 'value'}})
+
+
+def test_config_cache_invalidated_by_size_change(tmp_path):
+	config = tmp_path.joinpath("build.yaml")
+	write_config(config, "key: value\n", 1_000_000_000)
+	make_builder(tmp_path).PopulateLocalConfig("build.yaml")
+
+	# Same mtime, different size.
+	write_config(config, "key: longer value\n", 1_000_000_000)
+	builder = make_builder(tmp_path)
+	builder.PopulateLocalConfig("build.yaml")
+	assert(builder.config == {'key': 'longer value'})
+
+
+def test_config_cache_invalidated_by_mtime_change(tmp_path):
+	config = tmp_path.joinpath("build.yaml")
+	write_config(config, "key: one\n", 1_000_000_000)
+	make_builder(tmp_path).PopulateLocalConfig("build.yaml")
+
+	# Same size, different mtime.
+	write_config(config, "key: two\n", 2_000_000_000)
+	builder = make_builder(tmp_path)
+	builder.PopulateLocalConfig("build.yaml")
+	assert(builder.config == {'key': 'two'})
+
+
+def test_copies_overlap_with_nested_destinations():
+	copies = [
+		("/project/src", "/out/build"),
+		("/project/inc", "/out/build/inc"),
+	]
+	assert(Builder.DoCopiesOverlap(copies))
+
+
+def test_copies_overlap_with_destination_inside_source():
+	copies = [
+		("/project/src", "/out/src"),
+		("/project/inc", "/project/src/inc"),
+	]
+	assert(Builder.DoCopiesOverlap(copies))
+
+
+def test_copies_do_not_overlap_when_disjoint():
+	copies = [
+		("/project/src", "/out/src"),
+		("/project/inc", "/out/inc"),
+		("/project/src", "/out/src_again"),
+	]
+	assert(not Builder.DoCopiesOverlap(copies))
+
+
+# Records CopyPath calls in place of copying.
+def record_copies(monkeypatch, raiseFor=None):
+	calls = []
+	def copyPath(source, destination):
+		if (source == raiseFor):
+			raise OSError(f"could not copy {source}")
+		calls.append((source, destination))
+	monkeypatch.setattr(Builder, 'CopyPath', staticmethod(copyPath))
+	return calls
+
+
+def test_overlapping_copies_run_sequentially_in_order(monkeypatch):
+	def noPool(*args, **kwargs):
+		raise AssertionError("overlapping copies should not be run concurrently")
+	monkeypatch.setattr(BuilderModule, 'ThreadPoolExecutor', noPool)
+	calls = record_copies(monkeypatch)
+
+	copies = [
+		("/project/src", "/out/build"),
+		("/project/inc", "/out/build/inc"),
+		("/project/test", "/out/test"),
+	]
+	Builder("test").CopyAll(copies)
+	assert(calls == copies)
+
+
+def test_copy_error_in_worker_reaches_caller(monkeypatch):
+	record_copies(monkeypatch, raiseFor="/project/inc")
+
+	copies = [
+		("/project/src", "/out/src"),
+		("/project/inc", "/out/inc"),
+		("/project/test", "/out/test"),
+	]
+	with pytest.raises(OSError, match="/project/inc"):
+		Builder("test").CopyAll(copies)
+
+
+def test_concurrent_copies(tmp_path):
+	source = tmp_path.joinpath("project")
+	source.joinpath("src", "sub").mkdir(parents=True)
+	source.joinpath("src", "a.txt").write_text("a")
+	source.joinpath("src", "sub", "b.txt").write_text("b")
+	source.joinpath("README.md").write_text("readme")
+	out = tmp_path.joinpath("out")
+
+	Builder("test").CopyAll([
+		(str(source.joinpath("src")), str(out.joinpath("src"))),
+		(str(source.joinpath("README.md")), str(out.joinpath("README.md"))),
+	])
+	assert(out.joinpath("src", "a.txt").read_text() == "a")
+	assert(out.joinpath("src", "sub", "b.txt").read_text() == "b")
+	assert(out.joinpath("README.md").read_text() == "readme")
+
+
+def test_copy_file_into_existing_directory(tmp_path):
+	source = tmp_path.joinpath("tool.sh")
+	source.write_text("#!/bin/sh\n")
+	source.chmod(0o750)
+	destination = tmp_path.joinpath("bin")
+	destination.mkdir()
+
+	Builder.CopyPath(str(source), str(destination))
+	copied = destination.joinpath("tool.sh")
+	assert(copied.read_text() == "#!/bin/sh\n")
+	assert((copied.stat().st_mode & 0o777) == 0o750)
+
+
+def test_copy_file_onto_itself_is_logged_not_raised(tmp_path):
+	source = tmp_path.joinpath("same.txt")
+	source.write_text("same")
+	Builder.CopyPath(str(source), str(source))
+	assert(source.read_text() == "same")
+
+
+def test_explicit_local_config_is_loaded_after_first_lookup(tmp_path):
+	write_config(tmp_path.joinpath("extra.yaml"), "k: v\n")
+	builder = make_builder(tmp_path)
+	builder.config = {}
+	builder.PopulateLocalConfig("extra.yaml")
+	assert(builder.config == {'k': 'v'})
+
+
+# Stands in for EBBS: records the config each Build gets, then changes it as a Builder might.
+class MutatingExecutor:
+	def __init__(this):
+		this.received = []
+
+	def Build(this, build, config=None, **kwargs):
+		this.received.append(config)
+		config['settings']['key'] = build
+		config['list'].append(build)
+		return True
+
+
+def test_call_next_gives_each_step_its_own_config(tmp_path):
+	shared = {'name': 'child', 'type': 'lib', 'settings': {'key': 'value'}, 'list': ['a']}
+	builder = make_builder(tmp_path)
+	builder.executor = MutatingExecutor()
+	builder.events = set()
+	builder.projectName = "parent"
+	builder.projectType = "exe"
+	builder.next = [
+		{'build': 'first', 'config': shared},
+		{'build': 'second', 'config': shared},
+	]
+
+	assert(builder.CallNext())
+
+	# Our next tree is left as it was.
+	assert(shared == {'name': 'child', 'type': 'lib', 'settings': {'key': 'value'}, 'list': ['a']})
+	for nxt in builder.next:
+		assert(nxt['config'] is shared)
+
+	# Each step got (and changed) its own copy, even though they share one config.
+	first, second = builder.executor.received
+	assert(first is not shared and second is not shared)
+	assert(first is not second)
+	assert(first == {'name': 'child', 'type': 'lib', 'settings': {'key': 'first'}, 'list': ['a', 'first']})
+	assert(second == {'name': 'child', 'type': 'lib', 'settings': {'key': 'second'}, 'list': ['a', 'second']})
@@ -0,0 +1,30 @@
+import pytest
+import yaml
+from ebbs.EBBS import EBBS
+
+
+configs = {
+	"strict.json": '{\n\t"name": "ebbs",\n\t"next": [{"build": "proxy", "run_when_any": ["github"]}]\n}\n',
+	"yaml_flavoured.json": 'name: ebbs\nnext:\n- build: proxy\n\trun_when_any:\n\t- github\n',
+	"bom.json": '\ufeff{"name": "ebbs", "type": "exe"}\n',
+	"big_int.json": '{"name": "ebbs", "id": 18446744073709551616}\n',
+	"exponent.json": '{"name": "ebbs", "lower": 1e3, "upper": 1E5}\n',
+	"tabbed.yaml": 'name: ebbs\nnext:\n- build: proxy\n\tconfig:\n\t\tclear_build_path: false\n',
+}
+
+
+@pytest.mark.parametrize("fileName", list(configs.keys()))
+def test_parse_config_file_matches_yaml(tmp_path, fileName):
+	configFile = tmp_path.joinpath(fileName)
+	configFile.write_text(configs[fileName], encoding="utf-8")
+
+	# What ebbs has always done: read the text, swap tabs for spaces, and parse as yaml.
+	with open(configFile, "r", encoding="utf-8") as file:
+		expected = yaml.safe_load(file.read().replace('\t', '  '))
+
+	# PopulateLocalConfig hands ParseConfigFile a file opened in text mode.
+	with open(configFile, "r", encoding="utf-8") as file:
+		parsed = EBBS.ParseConfigFile(None, fileName.split('.')[-1], file)
+
+	assert(parsed == expected)
+	assert(parsed["name"] == "ebbs")